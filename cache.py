@@ -0,0 +1,48 @@
+"""
+Reply cache for GPT-Clip.
+
+Replies are stored in a small SQLite database keyed by a hash of everything
+that determines the request (model, temperature, system prompt and clipboard
+text), so re-running gpt-clip on the same input skips the API round-trip.
+"""
+import os
+import sqlite3
+import hashlib
+from typing import Optional, Tuple
+
+# Default cache location, resolved once at import
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "gpt-clip",
+    "responses.sqlite"
+)
+
+def cache_key(model: str, temperature: float, system_prompt: str, text: str) -> bytes:
+    """Return the cache key for a request."""
+    data = "\0".join((model, repr(temperature), system_prompt, text))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+def open_cache(path: Optional[str] = None) -> sqlite3.Connection:
+    """Open (creating if needed) the reply cache database."""
+    path = path or CACHE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS replies ("
+        "key BLOB PRIMARY KEY, reply TEXT NOT NULL, response_id TEXT)"
+    )
+    return conn
+
+def get_reply(conn: sqlite3.Connection, key: bytes) -> Optional[Tuple[str, str]]:
+    """Return the cached ``(reply, response_id)`` for ``key``, or None."""
+    return conn.execute(
+        "SELECT reply, response_id FROM replies WHERE key = ?", (key,)
+    ).fetchone()
+
+def store_reply(conn: sqlite3.Connection, key: bytes, reply: str, response_id: Optional[str]) -> None:
+    """Store the reply for ``key``, replacing any earlier entry."""
+    conn.execute(
+        "INSERT OR REPLACE INTO replies (key, reply, response_id) VALUES (?, ?, ?)",
+        (key, reply, response_id)
+    )
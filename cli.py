@@ -31,7 +31,6 @@ copies the response back to the clipboard.
 Requirements:
     - pyperclip: For clipboard operations
     - openai: For interacting with OpenAI's API
-    - python-dotenv: For environment variable management
     - pydantic: For configuration validation
     - Valid OpenAI API key set in OPENAI_API_KEY environment variable
     - Configuration file in ~/.config/gpt-clip/config.json
@@ -44,26 +43,70 @@ Configuration can be set via:
 """
 import os
 import sys
-import logging
-import argparse
-from logging.handlers import TimedRotatingFileHandler
+import time
+from types import SimpleNamespace
 
-from config import GPTClipConfig
+__version__ = "0.2.2"
+
+# Markdown entry appended to gpt-clip.md once per session
+LOG_TEMPLATE = (
+    "## {timestamp}\n\n"
+    "**System Prompt:**\n{system_prompt}\n\n"
+    "**User Input:**\n```\n{user_input}\n```\n\n"
+    "**Reply:**\n```\n{reply}\n```\n\n"
+    "- **Model:** {model}\n"
+    "- **Temperature:** {temperature}\n"
+    "- **Usage:** prompt_tokens: {usage_prompt_tokens}, completion_tokens: {usage_completion_tokens}, total_tokens: {usage_total_tokens}\n"
+    "- **Response ID:** {response_id}\n"
+    "\n---\n"
+)
 
 def parse_args():
     """Parse command line arguments."""
+    # Answer a bare --version without importing and building argparse
+    if sys.argv[1:] in (["-v"], ["--version"]):
+        print(f"gpt-clip {__version__}")
+        sys.exit(0)
+
+    import argparse
     parser = argparse.ArgumentParser(
         description="Copy text from clipboard, send to OpenAI's Chat API, and copy response back."
     )
     parser.add_argument(
-        "--config",
-        default=os.path.expanduser("~/.config/gpt-clip/config.json"),
-        help="Path to config file"
+        "-c", "--config",
+        help="Path to config file (default: $XDG_CONFIG_HOME/gpt-clip/config.json)"
     )
     parser.add_argument("--model", help="OpenAI model to use")
     parser.add_argument("--prompt", help="Custom system prompt")
     parser.add_argument("--temperature", type=float, help="Temperature for response generation")
     parser.add_argument("--no-log", action="store_true", help="Disable logging")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse cached replies")
+    parser.add_argument(
+        "-v", "--version",
+        action="version",
+        version=f"gpt-clip {__version__}"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="Send each non-empty line of PATH as its own request and print input<TAB>reply lines"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=20,
+        help="Maximum number of concurrent requests in batch mode (default: 20)"
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="With --batch, submit one OpenAI Batch API job (half price, may take up to 24h) and wait for it"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the reply to stdout as it is generated"
+    )
     
     # Ignore unknown arguments when running tests
     if "pytest" in sys.argv[0]:
@@ -71,15 +114,238 @@ def parse_args():
         return args
     return parser.parse_args()
 
+def collect_stream(stream):
+    """
+    Echo a streamed chat completion to stdout and rebuild a response object.
+
+    The returned object exposes the same ``choices[0].message.content``,
+    ``usage`` and ``id`` attributes as a non-streamed response, so the rest of
+    :func:`main` does not need to know which mode was used.
+    """
+    parts = []
+    response_id = None
+    usage = SimpleNamespace(prompt_tokens=None, completion_tokens=None, total_tokens=None)
+    for chunk in stream:
+        response_id = chunk.id
+        # The final chunk carries usage and no choices when include_usage is set
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                sys.stdout.write(delta)
+                sys.stdout.flush()
+    sys.stdout.write("\n")
+    return build_response("".join(parts), response_id, usage)
+
+def build_response(content, response_id, usage):
+    """Build an object shaped like a chat completion response."""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(id=response_id, usage=usage, choices=[SimpleNamespace(message=message)])
+
+def rotate_log(log_path, backup_count):
+    """
+    Roll the log file over once per day, keeping ``backup_count`` backups.
+
+    Backups are named ``<log>.YYYY-MM-DD`` like TimedRotatingFileHandler does,
+    but the check is a single ``stat`` at startup rather than a handler that
+    tracks rollover times on every emit.
+    """
+    try:
+        mtime = os.stat(log_path).st_mtime
+    except FileNotFoundError:
+        return
+    day = time.strftime("%Y-%m-%d", time.localtime(mtime))
+    if day == time.strftime("%Y-%m-%d"):
+        return
+    os.replace(log_path, f"{log_path}.{day}")
+
+    log_dir, log_name = os.path.split(log_path)
+    prefix = log_name + "."
+    backups = sorted(name for name in os.listdir(log_dir) if name.startswith(prefix))
+    for name in backups[:-backup_count]:
+        os.unlink(os.path.join(log_dir, name))
+
+def build_messages(system_prompt, text):
+    """Build the chat messages for one request."""
+    messages = []
+    if system_prompt:
+        messages.append({'role': 'system', 'content': system_prompt})
+    messages.append({'role': 'user', 'content': text})
+    return messages
+
+def build_async_client(api_key, concurrency):
+    """
+    Create the AsyncOpenAI client shared by every batch request.
+
+    The connection pool holds exactly ``concurrency`` connections and keeps
+    them all alive, so requests waiting on the semaphore reuse a warm
+    connection instead of opening a new one.
+    """
+    import openai
+
+    http_client_cls = getattr(openai, 'DefaultAsyncHttpxClient', None)
+    if http_client_cls is None:  # openai < 1.17: keep the client's own pool
+        return openai.AsyncOpenAI(api_key=api_key)
+    # Same Limits type and keep-alive expiry as the client's default pool
+    default = openai.DEFAULT_CONNECTION_LIMITS
+    limits = type(default)(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+        keepalive_expiry=default.keepalive_expiry
+    )
+    return openai.AsyncOpenAI(api_key=api_key, http_client=http_client_cls(limits=limits))
+
+async def run_batch(client, config, texts, concurrency):
+    """
+    Send each text as its own chat completion, at most ``concurrency`` at a time.
+
+    Returns one entry per text, in input order: the response, or the exception
+    raised for that request. Rate-limit (429) responses are retried by the
+    client itself, honouring the Retry-After header.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def complete(text):
+        async with semaphore:
+            return await client.chat.completions.create(
+                model=config.model,
+                messages=build_messages(config.system_prompt, text),
+                temperature=config.temperature
+            )
+
+    async with client:
+        return await asyncio.gather(*(complete(text) for text in texts), return_exceptions=True)
+
+def run_batch_api(client, config, texts, poll_interval=30):
+    """
+    Send every text as one OpenAI Batch API job and wait for it to finish.
+
+    Batch jobs cost half as much as individual requests and do not count
+    towards the per-minute rate limits, but may take up to 24 hours. Returns
+    one entry per text, in input order: the response, or an exception for a
+    request that did not succeed.
+    """
+    import json
+
+    lines = "\n".join(
+        json.dumps({
+            'custom_id': str(i),
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': config.model,
+                'messages': build_messages(config.system_prompt, text),
+                'temperature': config.temperature
+            }
+        })
+        for i, text in enumerate(texts)
+    )
+    input_file = client.files.create(file=('batch.jsonl', lines.encode('utf-8')), purpose='batch')
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint='/v1/chat/completions',
+        completion_window='24h'
+    )
+    print(f"Submitted batch {batch.id}; waiting for it to complete...", file=sys.stderr)
+    while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+
+    # Requests missing from the output files never ran
+    results = [
+        RuntimeError(f"batch {batch.id} ended with status {batch.status!r}")
+        for _ in texts
+    ]
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            record = json.loads(line)
+            response = record.get('response') or {}
+            body = response.get('body') or {}
+            if response.get('status_code') == 200:
+                usage = body.get('usage') or {}
+                results[int(record['custom_id'])] = build_response(
+                    body['choices'][0]['message']['content'],
+                    body.get('id'),
+                    SimpleNamespace(
+                        prompt_tokens=usage.get('prompt_tokens'),
+                        completion_tokens=usage.get('completion_tokens'),
+                        total_tokens=usage.get('total_tokens')
+                    )
+                )
+            else:
+                error = record.get('error') or body.get('error') or {}
+                results[int(record['custom_id'])] = RuntimeError(error.get('message', 'request failed'))
+    return results
+
+def tsv_field(text):
+    """Escape backslashes, tabs and newlines so text fits in one TSV field."""
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\r', '\\r').replace('\n', '\\n'))
+
+def log_fields(config, user_input, reply, response):
+    """Collect the LOG_TEMPLATE fields for one request."""
+    return {
+        'system_prompt': config.system_prompt,
+        'user_input': user_input,
+        'reply': reply,
+        'model': config.model,
+        'temperature': config.temperature,
+        'usage_prompt_tokens': response.usage.prompt_tokens,
+        'usage_completion_tokens': response.usage.completion_tokens,
+        'usage_total_tokens': response.usage.total_tokens,
+        'response_id': response.id
+    }
+
+def format_log_entry(fields, log_format='markdown'):
+    """
+    Format one session entry.
+
+    ``markdown`` entries use LOG_TEMPLATE; ``json`` entries are a single JSON
+    object per line (JSON Lines), which is easier to tail and parse.
+    """
+    # Timestamp first, so an entry's age is at the start of its line
+    fields = {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), **fields}
+    if log_format == 'json':
+        import json
+        return json.dumps(fields, ensure_ascii=False) + "\n"
+    return LOG_TEMPLATE.format_map(fields)
+
+def write_log(log_path, fields, log_format='markdown'):
+    """
+    Append one formatted session entry to the log file.
+
+    The entry is written with O_APPEND under an exclusive ``flock`` (where
+    available), so concurrent gpt-clip runs never interleave their entries.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        fcntl = None
+
+    data = memoryview(format_log_entry(fields, log_format).encode('utf-8'))
+    fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
 def main():
     """
     Main function that orchestrates the clipboard-to-ChatGPT workflow.
 
     The function performs the following steps:
     1. Loads configuration from the config file
-    2. Initializes OpenAI client (supports both new and legacy API)
+    2. Initializes the OpenAI v1 client
     3. Reads text from clipboard
-    4. Sends the text to OpenAI's Chat API
+    4. Sends the text to OpenAI's Chat API (optionally streaming the reply to stdout)
     5. Copies the response back to clipboard
 
     Raises:
@@ -94,114 +360,185 @@ def main():
     except ImportError:
         print("Missing dependency: pyperclip. Install with 'pip install pyperclip'", file=sys.stderr)
         sys.exit(1)
-    try:
-        import openai
-    except ImportError:
-        print("Missing dependency: openai. Install with 'pip install openai'", file=sys.stderr)
-        sys.exit(1)
 
-    # Load config
+    # Load config (imported here so --help does not pay for pydantic)
+    from config import GPTClipConfig, CONFIG_PATH
+    config_path = os.path.abspath(args.config or CONFIG_PATH)
     try:
-        config = GPTClipConfig.load_config(args.config)
+        config = GPTClipConfig.load_config(config_path)
     except Exception as e:
         print(f"Error loading configuration: {e}", file=sys.stderr)
         sys.exit(1)
 
     # Override config values if provided in command line
+    overrides = {}
     if args.model:
-        config.model = args.model
+        overrides["model"] = args.model
     if args.prompt:
-        config.system_prompt = args.prompt
+        overrides["system_prompt"] = args.prompt
     if args.temperature is not None:
-        config.temperature = args.temperature
+        overrides["temperature"] = args.temperature
     if args.no_log:
-        config.log_enabled = False
+        overrides["log_enabled"] = False
+    if args.no_cache:
+        overrides["cache_enabled"] = False
+    if overrides:
+        config = config.model_copy(update=overrides)
 
     # Setup logging only if enabled
     if config.log_enabled:
-        config_path = os.path.abspath(args.config)
         log_dir = os.path.dirname(config_path)
         os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, 'gpt-clip.md')
-        logger = logging.getLogger('gpt_clip')
-        logger.setLevel(logging.INFO)
-        handler = TimedRotatingFileHandler(
-            log_path,
-            when='D',
-            interval=1,
-            backupCount=config.log_retention_days
-        )
-        md_format = (
-            "## %(asctime)s\n\n"
-            "**System Prompt:**\n%(system_prompt)s\n\n"
-            "**User Input:**\n```\n%(user_input)s\n```\n\n"
-            "**Reply:**\n```\n%(reply)s\n```\n\n"
-            "- **Model:** %(model)s\n"
-            "- **Temperature:** %(temperature)s\n"
-            "- **Usage:** prompt_tokens: %(usage_prompt_tokens)s, completion_tokens: %(usage_completion_tokens)s, total_tokens: %(usage_total_tokens)s\n"
-            "- **Response ID:** %(response_id)s\n"
-            "\n---\n"
-        )
-        formatter = logging.Formatter(md_format, datefmt="%Y-%m-%d %H:%M:%S")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        log_name = 'gpt-clip.jsonl' if config.log_format == 'json' else 'gpt-clip.md'
+        log_path = os.path.join(log_dir, log_name)
+        rotate_log(log_path, config.log_retention_days)
 
-    # Set API key and initialize OpenAI client (new or legacy)
+    # Check API key before touching the clipboard
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         print("Error: OPENAI_API_KEY environment variable not set.", file=sys.stderr)
         sys.exit(1)
 
-    # Initialize OpenAI client
-    client = openai.OpenAI(api_key=api_key)
+    if args.batch_api and not args.batch:
+        print("Error: --batch-api requires --batch.", file=sys.stderr)
+        sys.exit(1)
+
+    # Batch mode reads its inputs from a file instead of the clipboard
+    if args.batch:
+        try:
+            with open(args.batch, encoding='utf-8') as f:
+                texts = [line.rstrip('\n') for line in f if line.strip()]
+        except OSError as e:
+            print(f"Error reading batch file: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.concurrency < 1:
+            print("Error: --concurrency must be at least 1.", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            import openai
+        except ImportError:
+            print("Missing dependency: openai. Install with 'pip install openai'", file=sys.stderr)
+            sys.exit(1)
+
+        if args.batch_api:
+            try:
+                responses = run_batch_api(openai.OpenAI(api_key=api_key), config, texts)
+            except Exception as e:
+                print(f"OpenAI Batch API job failed: {e}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            import asyncio
+            # One client, and so one connection pool, is shared by every request
+            client = build_async_client(api_key, args.concurrency)
+            responses = asyncio.run(run_batch(client, config, texts, args.concurrency))
+
+        failed = False
+        rows = []
+        for text, response in zip(texts, responses):
+            if isinstance(response, Exception):
+                print(f"OpenAI API request failed for {text!r}: {response}", file=sys.stderr)
+                failed = True
+                continue
+            reply = response.choices[0].message.content
+            rows.append(f"{tsv_field(text)}\t{tsv_field(reply)}\n")
+            if config.log_enabled:
+                write_log(log_path, log_fields(config, text, reply, response), config.log_format)
+
+        # Emit all rows with one write rather than a print per row
+        sys.stdout.write("".join(rows))
+        sys.stdout.flush()
+        if failed:
+            sys.exit(1)
+        return
+
+    # Read from clipboard in the background while openai is imported and the
+    # client is built; on Linux the paste waits on an xclip/xsel subprocess
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        clipboard_future = pool.submit(pyperclip.paste)
+        try:
+            import openai
+        except ImportError:
+            print("Missing dependency: openai. Install with 'pip install openai'", file=sys.stderr)
+            sys.exit(1)
+
+        # Initialize OpenAI client
+        client = openai.OpenAI(api_key=api_key)
+        clipboard_text = clipboard_future.result()
 
-    # Read from clipboard
-    clipboard_text = pyperclip.paste()
     if not clipboard_text.strip():
         print("Clipboard is empty or whitespace.", file=sys.stderr)
         sys.exit(1)
 
     # Prepare messages
-    messages = []
-    if config.system_prompt:
-        messages.append({'role': 'system', 'content': config.system_prompt})
-    messages.append({'role': 'user', 'content': clipboard_text})
+    messages = build_messages(config.system_prompt, clipboard_text)
 
-    # Call OpenAI API
-    try:
-        response = client.chat.completions.create(
-            model=config.model,
-            messages=messages,
-            temperature=config.temperature
+    # Reuse the reply to an identical earlier request if caching is enabled;
+    # the cache is an optimisation, so any failure to use it only warns
+    cached = None
+    cache_conn = None
+    if config.cache_enabled:
+        import sqlite3
+        import cache as reply_cache
+        cache_key = reply_cache.cache_key(
+            config.model, config.temperature, config.system_prompt, clipboard_text
         )
-    except Exception as e:
-        print(f"OpenAI API request failed: {e}", file=sys.stderr)
-        sys.exit(1)
+        try:
+            cache_conn = reply_cache.open_cache()
+            cached = reply_cache.get_reply(cache_conn, cache_key)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: reply cache unavailable: {e}", file=sys.stderr)
+            if cache_conn is not None:
+                cache_conn.close()
+                cache_conn = None
 
-    # Extract and copy response
     try:
-        reply = response.choices[0].message.content
-        pyperclip.copy(reply)
-
-        # Log if enabled
-        if config.log_enabled:
-            logger.info(
-                "",
-                extra={
-                    'system_prompt': config.system_prompt,
-                    'user_input': clipboard_text,
-                    'reply': reply,
-                    'model': config.model,
-                    'temperature': config.temperature,
-                    'usage_prompt_tokens': response.usage.prompt_tokens,
-                    'usage_completion_tokens': response.usage.completion_tokens,
-                    'usage_total_tokens': response.usage.total_tokens,
-                    'response_id': response.id
-                }
-            )
-    except Exception as e:
-        print(f"Error processing response: {e}", file=sys.stderr)
-        sys.exit(1)
+        if cached:
+            reply, response_id = cached
+            if args.stream:
+                sys.stdout.write(reply + "\n")
+            # No tokens were spent on this run
+            usage = SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+            response = build_response(reply, response_id, usage)
+        else:
+            # Call OpenAI API
+            request = {
+                'model': config.model,
+                'messages': messages,
+                'temperature': config.temperature
+            }
+            if args.stream:
+                request['stream'] = True
+                request['stream_options'] = {'include_usage': True}
+            try:
+                response = client.chat.completions.create(**request)
+                if args.stream:
+                    response = collect_stream(response)
+            except Exception as e:
+                print(f"OpenAI API request failed: {e}", file=sys.stderr)
+                sys.exit(1)
+
+        # Extract and copy response
+        try:
+            reply = response.choices[0].message.content
+            pyperclip.copy(reply)
+
+            # Log if enabled
+            if config.log_enabled:
+                write_log(log_path, log_fields(config, clipboard_text, reply, response), config.log_format)
+        except Exception as e:
+            print(f"Error processing response: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if cache_conn is not None and not cached:
+            try:
+                reply_cache.store_reply(cache_conn, cache_key, reply, response.id)
+            except sqlite3.Error as e:
+                print(f"Warning: could not cache the reply: {e}", file=sys.stderr)
+    finally:
+        if cache_conn is not None:
+            cache_conn.close()
 
 if __name__ == '__main__':
     main()
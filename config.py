@@ -2,29 +2,72 @@
 Configuration management module for GPT-Clip.
 """
 import os
-import json
+import re
+import time
+import functools
 from pathlib import Path
-from typing import Optional
-from pydantic import BaseModel, Field, field_validator
-from datetime import datetime, timedelta
-
-# Default configuration path
-CONFIG_PATH = os.path.expanduser("~/.config/gpt-clip/config.json")
+from typing import ClassVar, Literal, Optional, TypeAlias, Union
+from pydantic import BaseModel, ConfigDict, Field
+
+# Default configuration path, resolved once at import
+CONFIG_DIR: Path = Path(os.environ.get("XDG_CONFIG_HOME") or "~/.config").expanduser() / "gpt-clip"
+CONFIG_PATH: Path = CONFIG_DIR / "config.json"
+LOG_DIR: Path = CONFIG_DIR / "logs"
+
+# Paths accepted by the load/save helpers
+ConfigPathT: TypeAlias = Optional[Union[str, Path]]
+
+# Leading "timestamp" field of a JSON log entry
+_JSON_TIMESTAMP_RE = re.compile(rb'^\s*\{\s*"timestamp"\s*:\s*"([^"]+)"')
+
+# Environment variables that override config file values
+ENV_MAPPING = (
+    ("GPT_CLIP_SYSTEM_PROMPT", "system_prompt"),
+    ("GPT_CLIP_MODEL", "model"),
+    ("GPT_CLIP_TEMPERATURE", "temperature"),
+    ("GPT_CLIP_LOG_ENABLED", "log_enabled"),
+    ("GPT_CLIP_LOG_RETENTION_DAYS", "log_retention_days"),
+    ("GPT_CLIP_LOG_FORMAT", "log_format"),
+    ("GPT_CLIP_CACHE_ENABLED", "cache_enabled"),
+)
+_ENV_KEYS = frozenset(env_var for env_var, _ in ENV_MAPPING)
+_NO_ENV_VALUES = (None,) * len(ENV_MAPPING)
+
+def _parse_bool(value: str) -> bool:
+    """Parse a boolean environment value."""
+    return value.lower() == "true"
+
+# Parsers for non-string env overrides; anything else is passed through as str
+_ENV_PARSERS = {
+    "temperature": float,
+    "log_retention_days": int,
+    "log_enabled": _parse_bool,
+    "cache_enabled": _parse_bool,
+}
 
 class GPTClipConfig(BaseModel):
     """Configuration model for GPT-Clip."""
+    # Build the schema on first use and skip copying on validation
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
+    DEFAULT_SYSTEM_PROMPT: ClassVar[str] = (
+        "You are a helpful assistant that improves text. Fix any spelling, "
+        "grammar, or punctuation errors. Make the text more concise and clear "
+        "while preserving its meaning."
+    )
+
     system_prompt: str = Field(
-        default="You are a helpful assistant that improves text. Fix any spelling, grammar, or punctuation errors. Make the text more concise and clear while preserving its meaning.",
+        default=DEFAULT_SYSTEM_PROMPT,
         description="System prompt for OpenAI API"
     )
-    model: str = Field(
+    model: Literal["gpt-3.5-turbo", "gpt-4"] = Field(
         default="gpt-3.5-turbo",
         description="OpenAI model to use"
     )
     temperature: float = Field(
         default=0.7,
         ge=0.0,
-        le=2.0,
+        le=1.0,
         description="Temperature for response generation"
     )
     log_enabled: bool = Field(
@@ -36,122 +79,147 @@ class GPTClipConfig(BaseModel):
         ge=1,
         description="Number of days to keep logs"
     )
-    log_format: str = Field(
+    log_format: Literal["markdown", "json"] = Field(
         default="markdown",
         description="Format for log files (markdown or json)"
     )
+    cache_enabled: bool = Field(
+        default=False,
+        description="Whether to reuse cached replies for identical requests"
+    )
 
-    @field_validator("temperature")
     @classmethod
-    def validate_temperature(cls, v):
-        """Validate temperature is between 0 and 1."""
-        if not 0 <= v <= 1:
-            raise ValueError("Temperature must be between 0 and 1")
-        return v
+    @functools.lru_cache(maxsize=None)
+    def _default(cls) -> "GPTClipConfig":
+        """Return the shared all-defaults instance; safe to share as the model is frozen."""
+        return cls.model_construct()
 
-    @field_validator("model")
-    @classmethod
-    def validate_model(cls, v):
-        """Validate model name."""
-        valid_models = ["gpt-3.5-turbo", "gpt-4"]
-        if v not in valid_models:
-            raise ValueError(f"Model must be one of: {', '.join(valid_models)}")
-        return v
-
-    @field_validator("log_format")
     @classmethod
-    def validate_log_format(cls, v):
-        """Validate log format."""
-        valid_formats = ["markdown", "json"]
-        if v not in valid_formats:
-            raise ValueError(f"Log format must be one of: {', '.join(valid_formats)}")
-        return v
-
-    @field_validator("log_retention_days")
-    @classmethod
-    def validate_log_retention_days(cls, v):
-        """Validate log retention days."""
-        if v < 1:
-            raise ValueError("Log retention days must be at least 1")
-        return v
-
-    @classmethod
-    def load_config(cls, config_path: Optional[str | Path] = None) -> "GPTClipConfig":
-        """Load configuration from file and environment variables."""
-        config_path = Path(config_path or CONFIG_PATH)
-        config_data = {}
-
-        # Load from file if exists
-        if config_path.exists():
-            with open(config_path) as f:
-                config_data = json.load(f)
-
-        # Override with environment variables if set
-        env_mapping = {
-            "GPT_CLIP_SYSTEM_PROMPT": "system_prompt",
-            "GPT_CLIP_MODEL": "model",
-            "GPT_CLIP_TEMPERATURE": "temperature",
-            "GPT_CLIP_LOG_ENABLED": "log_enabled",
-            "GPT_CLIP_LOG_RETENTION_DAYS": "log_retention_days",
-            "GPT_CLIP_LOG_FORMAT": "log_format"
-        }
-
-        for env_var, config_key in env_mapping.items():
-            if env_value := os.getenv(env_var):
-                if config_key in ["temperature", "log_retention_days"]:
-                    config_data[config_key] = float(env_value)
-                elif config_key == "log_enabled":
-                    config_data[config_key] = env_value.lower() == "true"
-                else:
-                    config_data[config_key] = env_value
-
-        return cls(**config_data)
-
-    def save_config(self, config_path: Optional[str | Path] = None, encrypt: bool = False):
+    def load_config(cls, config_path: ConfigPathT = None) -> "GPTClipConfig":
+        """
+        Load configuration from file and environment variables.
+
+        The result is cached on the file's mtime and the GPT_CLIP_* values, so
+        repeated calls in one process skip the JSON parse and validation.
+        """
+        config_path = Path(config_path) if config_path else CONFIG_PATH
+        try:
+            mtime_ns = config_path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = -1
+        env = os.environ
+        if _ENV_KEYS.isdisjoint(env):
+            # Common case: no overrides, so skip the per-variable lookups
+            env_values = _NO_ENV_VALUES
+        else:
+            env_values = tuple(env.get(env_var) for env_var, _ in ENV_MAPPING)
+        return _load_cached(cls, str(config_path), mtime_ns, env_values)
+
+    def save_config(self, config_path: ConfigPathT = None):
         """Save configuration to file."""
-        config_path = Path(config_path or CONFIG_PATH)
+        config_path = Path(config_path) if config_path else CONFIG_PATH
         config_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Create backup if file exists
+        # Write the new configuration next to the old one first
+        _load_cached.cache_clear()
+        tmp_path = config_path.with_suffix(".json.tmp")
+        tmp_path.write_text(self.model_dump_json(indent=4))
+
+        # Keep the previous file as a backup (a hard link, so no copy)
         if config_path.exists():
             backup_path = config_path.with_suffix(".json.bak")
-            config_path.rename(backup_path)
+            backup_path.unlink(missing_ok=True)
+            os.link(config_path, backup_path)
 
-        # Save configuration
-        config_data = self.model_dump()
-        with open(config_path, "w") as f:
-            json.dump(config_data, f, indent=4)
+        # Swap in the new file atomically, so a config file always exists
+        os.replace(tmp_path, config_path)
 
     @classmethod
-    def create_default_config(cls, config_path: Optional[str | Path] = None):
+    def create_default_config(cls, config_path: ConfigPathT = None):
         """Create default configuration file."""
-        config = cls()
+        config = cls._default()
         config.save_config(config_path)
 
-    def cleanup_old_logs(self) -> None:
-        """Clean up old log files."""
+    def cleanup_old_logs(self, log_dir: ConfigPathT = None, by_content: bool = False) -> None:
+        """
+        Clean up old log files.
+
+        Files are aged by their mtime; pass ``by_content=True`` to use the
+        timestamp recorded in each file instead.
+        """
         if not self.log_enabled:
             return
 
-        log_dir = Path(os.path.expanduser("~/.config/gpt-clip/logs"))
+        log_dir = Path(log_dir) if log_dir else LOG_DIR
         if not log_dir.exists():
             return
 
-        cutoff_date = datetime.now() - timedelta(days=self.log_retention_days)
-        for log_file in log_dir.glob("*.log"):
-            try:
-                with open(log_file, "r") as f:
-                    if self.log_format == "json":
-                        log_data = json.load(f)
-                        timestamp = datetime.fromisoformat(log_data["timestamp"])
-                    else:
-                        # For markdown format, try to parse the timestamp from the first line
-                        first_line = f.readline()
-                        timestamp_str = first_line.split(" - ")[0].strip("# ")
-                        timestamp = datetime.fromisoformat(timestamp_str)
-
-                if timestamp < cutoff_date:
-                    log_file.unlink()
-            except (json.JSONDecodeError, ValueError, KeyError):
-                # If we can't parse the timestamp, keep the file
-                continue 
\ No newline at end of file
+        cutoff_ts = time.time() - self.log_retention_days * 86400
+        if not by_content:
+            # One directory pass; DirEntry.stat() reuses what scandir already read
+            with os.scandir(log_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".log") and entry.stat(follow_symlinks=False).st_mtime < cutoff_ts:
+                        os.unlink(entry.path)
+            return
+
+        # Only needed for this rarely-run path, so keep it off startup
+        from datetime import datetime
+
+        with os.scandir(log_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".log"):
+                    continue
+                try:
+                    with open(entry.path, "rb") as f:
+                        if self.log_format == "json":
+                            # The timestamp leads each entry, so the header is usually enough
+                            head = f.read(256)
+                            match = _JSON_TIMESTAMP_RE.match(head)
+                            if match:
+                                timestamp_str = match.group(1).decode()
+                            else:
+                                # Logs are JSON Lines, so parse only the first entry
+                                import json
+                                first_line = (head + f.readline()).partition(b"\n")[0]
+                                timestamp_str = json.loads(first_line)["timestamp"]
+                        else:
+                            # For markdown format, try to parse the timestamp from the first line
+                            first_line = f.readline().decode()
+                            timestamp_str = first_line.split(" - ")[0].strip("# ")
+                    timestamp = datetime.fromisoformat(timestamp_str)
+
+                    if timestamp.timestamp() < cutoff_ts:
+                        os.unlink(entry.path)
+                except (ValueError, KeyError, TypeError):
+                    # If we can't parse the timestamp, keep the file
+                    continue
+
+@functools.lru_cache(maxsize=1)
+def _load_cached(cls, config_path: str, mtime_ns: int, env_values: tuple) -> GPTClipConfig:
+    """Build a config from the file at ``config_path`` and the given env values."""
+    # Collect environment overrides first; they take precedence over the file
+    env_data = {}
+    for (env_var, config_key), env_value in zip(ENV_MAPPING, env_values):
+        if env_value:
+            env_data[config_key] = _ENV_PARSERS.get(config_key, str)(env_value)
+
+    # Load from file if exists, unless the environment sets every field
+    config_data = {}
+    if len(env_data) < len(ENV_MAPPING) and mtime_ns != -1:
+        raw = Path(config_path).read_bytes()
+        if not env_data:
+            # Let pydantic-core parse and validate the bytes in one pass
+            return cls.model_validate_json(raw)
+        import json
+        config_data = json.loads(raw)
+    config_data.update(env_data)
+
+    # Nothing differs from the defaults, so there is nothing to validate
+    if config_data.items() <= _DEFAULTS.items():
+        return cls._default()
+
+    return cls.model_validate(config_data)
+
+# Field defaults, used by load_config to skip validation when nothing is overridden
+_DEFAULTS = {name: field.default for name, field in GPTClipConfig.model_fields.items()}
@@ -15,11 +15,12 @@ setup(
     author='',
     author_email='',
     url='',
-    py_modules=['cli'],
+    py_modules=['cli', 'config', 'cache'],
     install_requires=[
-        # Requires OpenAI Python client with new OpenAI() client class (>=0.27.7)
-        'openai>=0.27.7',
+        # Requires OpenAI Python client with new OpenAI() client class (>=1.0.0)
+        'openai>=1.0.0',
         'pyperclip',
+        'pydantic>=2.0.0',
     ],
     entry_points={
         'console_scripts': [
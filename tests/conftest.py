@@ -2,23 +2,49 @@
 Shared test fixtures.
 """
 import os
+import sys
+import shutil
 import pytest
-from pathlib import Path
-from config import GPTClipConfig
 import json
-from unittest.mock import patch
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from config import GPTClipConfig
+
+@pytest.fixture(scope="session")
+def base_config_dir(tmp_path_factory):
+    """Create one configuration directory shared by the whole session."""
+    return tmp_path_factory.mktemp("cfg")
 
 @pytest.fixture
-def temp_config_dir(tmp_path):
-    """Create a temporary configuration directory."""
-    config_dir = tmp_path / "config"
-    config_dir.mkdir()
-    return config_dir
+def config_file(base_config_dir, request):
+    """Return a config file path unique to the requesting test."""
+    return base_config_dir / f"{request.node.name}.json"
+
+# Tests that chmod their log directory get a throwaway one of their own
+PRIVATE_LOG_DIR_TESTS = {"test_log_error_handling"}
+
+@pytest.fixture(scope="session")
+def log_root(tmp_path_factory):
+    """Create one root directory for all per-test log directories."""
+    return tmp_path_factory.mktemp("logs_root")
 
 @pytest.fixture
-def temp_config_file(temp_config_dir):
-    """Create a temporary configuration file."""
-    config_file = temp_config_dir / "config.json"
+def temp_log_dir(log_root, request):
+    """Create a temporary log directory, removed again after the test."""
+    if request.node.name in PRIVATE_LOG_DIR_TESTS:
+        log_dir = request.getfixturevalue("tmp_path") / "logs"
+    else:
+        log_dir = log_root / request.node.name
+    log_dir.mkdir()
+    yield log_dir
+    # Drop the whole tree at once so a repeated test can reuse the name
+    shutil.rmtree(log_dir, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def temp_config_file(tmp_path_factory):
+    """Create a temporary configuration file, shared across the session."""
+    config_file = tmp_path_factory.mktemp("config") / "config.json"
     config = {
         "system_prompt": "test prompt",
         "model": "gpt-3.5-turbo",
@@ -27,8 +53,7 @@ def temp_config_file(temp_config_dir):
         "log_retention_days": 30,
         "log_format": "markdown"
     }
-    with open(config_file, "w") as f:
-        json.dump(config, f)
+    config_file.write_bytes(json.dumps(config).encode())
     return config_file
 
 @pytest.fixture
@@ -41,4 +66,61 @@ def mock_env_vars():
         "GPT_CLIP_TEMPERATURE": "0.8"
     }
     with patch.dict(os.environ, env_vars):
-        yield env_vars 
\ No newline at end of file
+        yield env_vars
+
+@pytest.fixture(scope="session")
+def mock_config():
+    """Create a mock configuration."""
+    return GPTClipConfig(
+        system_prompt="test prompt",
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        log_enabled=True,
+        log_retention_days=30,
+        log_format="markdown"
+    )
+
+# Plain tuples shaped like a chat completion; main() only reads these fields
+Message = namedtuple("Message", "content")
+Choice = namedtuple("Choice", "message")
+Usage = namedtuple("Usage", "prompt_tokens completion_tokens total_tokens")
+Response = namedtuple("Response", "choices usage id")
+
+_RESP_TEMPLATE = Response(
+    choices=(Choice(Message("Test response")),),
+    usage=Usage(prompt_tokens=4, completion_tokens=6, total_tokens=10),
+    id="test-response-id"
+)
+
+@pytest.fixture(scope="session")
+def mock_openai_response():
+    """Create a mock OpenAI response."""
+    return _RESP_TEMPLATE
+
+@pytest.fixture
+def cli_env(mock_config, mock_openai_response, monkeypatch, tmp_path):
+    """
+    Patch config loading, the clipboard and the OpenAI clients for main().
+
+    Modules that drive main() enable it for every test with
+    ``pytestmark = pytest.mark.usefixtures("cli_env")``.
+    """
+    import openai
+    import pyperclip
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-api-key")
+    monkeypatch.setattr(sys, "argv", ["cli.py", "--config", str(tmp_path / "config.json")])
+    monkeypatch.setattr(GPTClipConfig, "load_config", lambda *_: mock_config)
+
+    env = SimpleNamespace(
+        paste=MagicMock(return_value="Test input"),
+        copy=MagicMock(),
+        client=MagicMock(),
+        async_client=MagicMock()
+    )
+    env.client.chat.completions.create.return_value = mock_openai_response
+    monkeypatch.setattr(pyperclip, "paste", env.paste)
+    monkeypatch.setattr(pyperclip, "copy", env.copy)
+    monkeypatch.setattr(openai, "OpenAI", MagicMock(return_value=env.client))
+    monkeypatch.setattr(openai, "AsyncOpenAI", MagicMock(return_value=env.async_client))
+    return env
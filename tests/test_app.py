@@ -1,126 +1,48 @@
 """
 Tests for the main application functionality.
 """
-import os
-import sys
 import pytest
 from unittest.mock import patch, MagicMock
-from pathlib import Path
-import pyperclip
 import openai
 import cli
 from config import GPTClipConfig
 
-@pytest.fixture
-def mock_config():
-    """Create a mock configuration."""
-    return GPTClipConfig(
-        system_prompt="test prompt",
-        model="gpt-3.5-turbo",
-        temperature=0.7,
-        log_enabled=True,
-        log_retention_days=30,
-        log_format="markdown"
-    )
+pytestmark = pytest.mark.usefixtures("cli_env")
 
-@pytest.fixture
-def mock_openai_response():
-    """Create a mock OpenAI response."""
-    response = MagicMock()
-    response.choices = [MagicMock()]
-    response.choices[0].message = MagicMock()
-    response.choices[0].message.content = "Test response"
-    response.usage = MagicMock()
-    response.usage.total_tokens = 10
-    return response
-
-def test_main_success(mock_config, mock_openai_response):
+def test_main_success(cli_env):
     """Test successful execution of main function."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config):
-
-        # Setup mock OpenAI client
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+    cli.main()
 
-        # Run main function
-        from cli import main
-        main()
+    # Verify clipboard operations
+    cli_env.copy.assert_called_once_with("Test response")
 
-        # Verify clipboard operations
-        mock_copy.assert_called_once_with("Test response")
-
-def test_main_empty_clipboard(mock_config):
+def test_main_empty_clipboard(cli_env):
     """Test handling of empty clipboard."""
-    with patch('pyperclip.paste', return_value=""), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
-
-        # Run main function
-        from cli import main
-        main()
+    cli_env.paste.return_value = ""
 
-        # Verify exit was called
-        mock_exit.assert_called_once_with(1)
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+    assert exc_info.value.code == 1
 
-def test_main_api_error(mock_config):
+def test_main_api_error(cli_env):
     """Test main function with API error."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
-
-        # Setup mock OpenAI client to raise an exception
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="API Error",
-            body={"error": {"message": "API Error"}},
-            request=MagicMock()
-        )
-
-        # Run main function
-        from cli import main
-        main()
-
-        # Verify exit was called
-        mock_exit.assert_called_once_with(1)
-
-def test_main_missing_api_key(mock_config):
-    """Test main function with missing API key."""
-    with patch('os.getenv', return_value=None), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
-
-        # Run main function
-        from cli import main
-        main()
-
-        # Verify exit was called
-        mock_exit.assert_called_once_with(1)
-
-def test_main_legacy_api(mock_config, mock_openai_response):
-    """Test main function with legacy OpenAI API."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI', side_effect=AttributeError), \
-         patch('openai.ChatCompletion.create', return_value=mock_openai_response), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('logging.getLogger') as mock_logger:
+    cli_env.client.chat.completions.create.side_effect = openai.APIError(
+        message="API Error",
+        body={"error": {"message": "API Error"}},
+        request=MagicMock()
+    )
 
-        # Setup logger mock
-        mock_log = MagicMock()
-        mock_logger.return_value = mock_log
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+    assert exc_info.value.code == 1
 
-        # Run main function
-        from cli import main
-        main()
+def test_main_missing_api_key(monkeypatch):
+    """Test main function with missing API key."""
+    monkeypatch.delenv("OPENAI_API_KEY")
 
-        # Verify clipboard operations
-        mock_copy.assert_called_once_with("Test response")
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+    assert exc_info.value.code == 1
 
 def test_parse_args():
     """Test command line argument parsing."""
@@ -129,45 +51,26 @@ def test_parse_args():
         args = parse_args()
         assert args.temperature == 0.5
 
-def test_main_with_custom_prompt(mock_config, mock_openai_response):
+def test_main_with_custom_prompt(cli_env, mock_config, monkeypatch):
     """Test main function with custom system prompt."""
-    mock_config.system_prompt = "Custom prompt"
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config):
-
-        # Setup mock OpenAI client
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
-
-        # Run main function
-        from cli import main
-        main()
-
-        # Verify API call
-        mock_client.chat.completions.create.assert_called_once()
-        call_args = mock_client.chat.completions.create.call_args[1]
-        assert call_args["messages"][0]["content"] == "Custom prompt"
-
-def test_main_with_logging_disabled(mock_config, mock_openai_response):
+    custom_config = mock_config.model_copy(update={"system_prompt": "Custom prompt"})
+    monkeypatch.setattr(GPTClipConfig, "load_config", lambda *_: custom_config)
+
+    cli.main()
+
+    # Verify API call
+    cli_env.client.chat.completions.create.assert_called_once()
+    call_args = cli_env.client.chat.completions.create.call_args[1]
+    assert call_args["messages"][0]["content"] == "Custom prompt"
+
+def test_main_with_logging_disabled(cli_env, mock_config, monkeypatch, tmp_path):
     """Test main function with logging disabled."""
-    mock_config.log_enabled = False
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('logging.getLogger') as mock_logger:
-
-        # Setup mock OpenAI client
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
-
-        # Run main function
-        from cli import main
-        main()
-
-        # Verify logging was not called
-        mock_logger.assert_not_called() 
\ No newline at end of file
+    quiet_config = mock_config.model_copy(update={"log_enabled": False})
+    monkeypatch.setattr(GPTClipConfig, "load_config", lambda *_: quiet_config)
+
+    cli.main()
+
+    # The reply is still copied, but no log is written next to the config
+    cli_env.copy.assert_called_once_with("Test response")
+    assert not (tmp_path / "gpt-clip.md").exists()
+    assert not (tmp_path / "gpt-clip.jsonl").exists()
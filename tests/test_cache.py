@@ -0,0 +1,49 @@
+"""
+Tests for the reply cache.
+"""
+import pytest
+from cache import cache_key, open_cache, get_reply, store_reply
+
+@pytest.fixture
+def cache_conn(tmp_path):
+    """Open a reply cache in a temporary directory."""
+    conn = open_cache(str(tmp_path / "cache" / "responses.sqlite"))
+    yield conn
+    conn.close()
+
+def test_cache_key():
+    """Test that every request field is part of the key."""
+    key = cache_key("gpt-4", 0.7, "prompt", "text")
+    assert key == cache_key("gpt-4", 0.7, "prompt", "text")
+    assert len(key) == 16
+    assert key != cache_key("gpt-3.5-turbo", 0.7, "prompt", "text")
+    assert key != cache_key("gpt-4", 0.5, "prompt", "text")
+    assert key != cache_key("gpt-4", 0.7, "other prompt", "text")
+    assert key != cache_key("gpt-4", 0.7, "prompt", "other text")
+    # Fields are separated, so shifting text between them changes the key
+    assert cache_key("gpt-4", 0.7, "ab", "c") != cache_key("gpt-4", 0.7, "a", "bc")
+
+def test_cache_miss(cache_conn):
+    """Test lookup of a key that was never stored."""
+    assert get_reply(cache_conn, cache_key("gpt-4", 0.7, "prompt", "text")) is None
+
+def test_cache_store_and_replace(cache_conn):
+    """Test storing and replacing a reply."""
+    key = cache_key("gpt-4", 0.7, "prompt", "text")
+    store_reply(cache_conn, key, "First reply", "id-1")
+    assert get_reply(cache_conn, key) == ("First reply", "id-1")
+
+    store_reply(cache_conn, key, "Second reply", "id-2")
+    assert get_reply(cache_conn, key) == ("Second reply", "id-2")
+
+def test_cache_persists(tmp_path):
+    """Test that replies survive reopening the database."""
+    path = str(tmp_path / "responses.sqlite")
+    key = cache_key("gpt-4", 0.7, "prompt", "text")
+    conn = open_cache(path)
+    store_reply(conn, key, "Test reply", "test-id")
+    conn.close()
+
+    conn = open_cache(path)
+    assert get_reply(conn, key) == ("Test reply", "test-id")
+    conn.close()
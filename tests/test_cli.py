@@ -1,118 +1,253 @@
 """
 Tests for the CLI functionality.
 """
-import os
 import sys
 import json
 import pytest
-from unittest.mock import patch, MagicMock
-from pathlib import Path
-from cli import main, parse_args
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
 from config import GPTClipConfig
-import openai
-
-@pytest.fixture
-def mock_config():
-    """Create a mock configuration."""
-    return GPTClipConfig(
-        system_prompt="test prompt",
-        model="gpt-3.5-turbo",
-        temperature=0.7,
-        log_enabled=True,
-        log_retention_days=30,
-        log_format="markdown"
-    )
 
-@pytest.fixture
-def mock_openai_response():
-    """Create a mock OpenAI response."""
-    response = MagicMock()
-    response.choices = [MagicMock()]
-    response.choices[0].message = MagicMock()
-    response.choices[0].message.content = "Test response"
-    response.usage = MagicMock()
-    response.usage.total_tokens = 10
-    return response
+pytestmark = pytest.mark.usefixtures("cli_env")
+
+@pytest.fixture(scope="session")
+def expected_call(mock_config):
+    """Build the chat completion arguments main() should send for "Test input"."""
+    return dict(
+        model=mock_config.model,
+        messages=[
+            {"role": "system", "content": mock_config.system_prompt},
+            {"role": "user", "content": "Test input"}
+        ],
+        temperature=mock_config.temperature
+    )
 
 def test_parse_args():
     """Test command line argument parsing."""
+    from cli import parse_args
     with patch('sys.argv', ['cli.py', '--temperature', '0.5']):
         args = parse_args()
         assert args.temperature == 0.5
 
-def test_main_success(mock_config, mock_openai_response):
+def test_parse_args_version(capsys):
+    """Test --version prints the version and exits."""
+    import cli
+    from cli import parse_args
+    for flag in ('--version', '-v'):
+        with patch('sys.argv', ['cli.py', flag]):
+            with pytest.raises(SystemExit) as exc_info:
+                parse_args()
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == f"gpt-clip {cli.__version__}\n"
+
+def test_build_messages():
+    """Test the chat messages sent for a request."""
+    from cli import build_messages
+    assert build_messages("Be brief", "Test input") == [
+        {'role': 'system', 'content': "Be brief"},
+        {'role': 'user', 'content': "Test input"},
+    ]
+    # An empty system prompt is left out rather than sent as an empty message
+    assert build_messages("", "Test input") == [{'role': 'user', 'content': "Test input"}]
+
+def test_main_success(cli_env, expected_call):
     """Test successful execution of main function."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config):
+    from cli import main
+
+    main()
+
+    # Verify API call and clipboard operations
+    cli_env.client.chat.completions.create.assert_called_once_with(**expected_call)
+    cli_env.copy.assert_called_once_with("Test response")
 
-        # Setup mock OpenAI client
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+def test_main_reuses_cached_reply(cli_env, mock_config, monkeypatch, tmp_path):
+    """Test that a repeated request is answered from the reply cache."""
+    import cache
+    from cli import main
 
-        # Run main function
+    monkeypatch.setattr(cache, "CACHE_PATH", str(tmp_path / "responses.sqlite"))
+    cached_config = mock_config.model_copy(update={"cache_enabled": True})
+    monkeypatch.setattr(GPTClipConfig, "load_config", lambda *_: cached_config)
+    monkeypatch.setattr(sys, "argv", sys.argv + ["--no-log"])
+
+    for _ in range(3):
         main()
 
-        # Verify clipboard operations
-        mock_copy.assert_called_once_with("Test response")
+    cli_env.client.chat.completions.create.assert_called_once()
+    assert cli_env.copy.call_count == 3
+    cli_env.copy.assert_called_with("Test response")
 
-def test_main_empty_clipboard(mock_config):
+def test_main_empty_clipboard(cli_env):
     """Test handling of empty clipboard."""
-    with patch('pyperclip.paste', return_value=""), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
+    from cli import main
+
+    cli_env.paste.return_value = ""
 
+    with pytest.raises(SystemExit) as exc_info:
         main()
-        mock_exit.assert_called_once_with(1)
+    assert exc_info.value.code == 1
 
-def test_main_api_error(mock_config):
+def test_main_api_error(cli_env):
     """Test handling of API errors."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('openai.OpenAI') as mock_openai, \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
-
-        # Setup mock OpenAI client to raise an exception
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="API Error",
-            body={"error": {"message": "API Error"}},
-            request=MagicMock()
-        )
+    from cli import main
+    import openai
 
+    cli_env.client.chat.completions.create.side_effect = openai.APIError(
+        message="API Error",
+        body={"error": {"message": "API Error"}},
+        request=MagicMock()
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
         main()
-        mock_exit.assert_called_once_with(1)
+    assert exc_info.value.code == 1
 
-def test_main_missing_api_key(mock_config):
+def test_main_missing_api_key(monkeypatch):
     """Test handling of missing API key."""
-    with patch('os.getenv', return_value=None), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('sys.exit') as mock_exit:
+    from cli import main
+
+    monkeypatch.delenv("OPENAI_API_KEY")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+
+def test_main_cache_failures_are_not_fatal(cli_env, mock_config, monkeypatch, tmp_path, capsys):
+    """Test that a broken reply cache only warns and the run still succeeds."""
+    import sqlite3
+    import cache
+    from cli import main
+
+    cached_config = mock_config.model_copy(update={"cache_enabled": True})
+    monkeypatch.setattr(GPTClipConfig, "load_config", lambda *_: cached_config)
+    monkeypatch.setattr(sys, "argv", sys.argv + ["--no-log"])
+
+    # The cache directory cannot be created: its parent is a regular file
+    (tmp_path / "not-a-dir").write_text("")
+    monkeypatch.setattr(cache, "CACHE_PATH", str(tmp_path / "not-a-dir" / "responses.sqlite"))
+    main()
+    assert "Warning: reply cache unavailable" in capsys.readouterr().err
+
+    # The reply cannot be stored, e.g. because the database is locked
+    monkeypatch.setattr(cache, "CACHE_PATH", str(tmp_path / "responses.sqlite"))
+    monkeypatch.setattr(cache, "store_reply", MagicMock(side_effect=sqlite3.OperationalError("database is locked")))
+    main()
+    assert "Warning: could not cache the reply: database is locked" in capsys.readouterr().err
+
+    assert cli_env.copy.call_count == 2
+    cli_env.copy.assert_called_with("Test response")
+
+def test_main_stream(cli_env, expected_call, monkeypatch, tmp_path, capsys):
+    """Test streaming the reply to stdout before copying it."""
+    from cli import main
+
+    def chunk(content=None, usage=None):
+        choices = [] if content is None else [MagicMock(delta=MagicMock(content=content))]
+        return MagicMock(id="stream-id", choices=choices, usage=usage)
+
+    usage = MagicMock(prompt_tokens=3, completion_tokens=2, total_tokens=5)
+    chunks = [chunk("Test "), chunk("response"), chunk(usage=usage)]
+    monkeypatch.setattr(sys, "argv", ['cli.py', '--stream', '--config', str(tmp_path / "config.json")])
+    create = cli_env.client.chat.completions.create
+    create.return_value = iter(chunks)
+
+    main()
+
+    create.assert_called_once_with(
+        **expected_call, stream=True, stream_options={"include_usage": True}
+    )
+    cli_env.copy.assert_called_once_with("Test response")
+    assert capsys.readouterr().out == "Test response\n"
+    log = (tmp_path / "gpt-clip.md").read_text()
+    assert "total_tokens: 5" in log
+    assert "- **Response ID:** stream-id" in log
+
+def test_main_batch(cli_env, monkeypatch, tmp_path, capsys):
+    """Test batch mode sends one request per line and prints TSV."""
+    from cli import main
 
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text("first input\n\nsecond\tinput\n")
+
+    def reply_for(**kwargs):
+        text = kwargs["messages"][-1]["content"]
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=f"Reply to {text}\nDone"))])
+
+    monkeypatch.setattr(sys, "argv", ['cli.py', '--batch', str(batch_file), '--concurrency', '2', '--no-log'])
+    create = cli_env.async_client.chat.completions.create = AsyncMock(side_effect=reply_for)
+
+    main()
+
+    assert create.await_count == 2
+    cli_env.paste.assert_not_called()
+    assert capsys.readouterr().out.splitlines() == [
+        "first input\tReply to first input\\nDone",
+        "second\\tinput\tReply to second\\tinput\\nDone",
+    ]
+
+def test_main_batch_request_error(cli_env, monkeypatch, tmp_path, capsys):
+    """Test batch mode reports failed requests and exits with an error."""
+    from cli import main
+
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text("good\nbad\n")
+
+    async def create(**kwargs):
+        if kwargs["messages"][-1]["content"] == "bad":
+            raise RuntimeError("API Error")
+        return MagicMock(choices=[MagicMock(message=MagicMock(content="ok"))])
+
+    monkeypatch.setattr(sys, "argv", ['cli.py', '--batch', str(batch_file), '--no-log'])
+    cli_env.async_client.chat.completions.create = AsyncMock(side_effect=create)
+
+    with pytest.raises(SystemExit) as exc_info:
         main()
-        mock_exit.assert_called_once_with(1)
-
-def test_main_legacy_api(mock_openai_response, mock_config):
-    """Test using legacy OpenAI API."""
-    with patch('pyperclip.paste', return_value="Test input"), \
-         patch('pyperclip.copy') as mock_copy, \
-         patch('openai.OpenAI', side_effect=AttributeError), \
-         patch('openai.ChatCompletion.create', return_value=mock_openai_response), \
-         patch('config.GPTClipConfig.load_config', return_value=mock_config), \
-         patch('logging.getLogger') as mock_logger:
-
-        # Setup logger mock
-        mock_log = MagicMock()
-        mock_logger.return_value = mock_log
-
-        # Run main function
+
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert captured.out == "good\tok\n"
+    assert "OpenAI API request failed for 'bad': API Error" in captured.err
+
+def test_main_batch_api(cli_env, monkeypatch, tmp_path, capsys):
+    """Test --batch-api submits one Batch API job and prints replies in input order."""
+    from cli import main
+
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text("first\nsecond\nthird\n")
+    monkeypatch.setattr(sys, "argv", ['cli.py', '--batch', str(batch_file), '--batch-api', '--no-log'])
+    monkeypatch.setattr("time.sleep", MagicMock())
+
+    def reply(custom_id, content):
+        body = {"id": f"resp-{custom_id}", "choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}}
+        return json.dumps({"custom_id": custom_id, "response": {"status_code": 200, "body": body}})
+
+    # Output records arrive in any order; the failed request goes to the error file
+    outputs = {
+        "file-out": "\n".join([reply("2", "Reply 3"), reply("0", "Reply 1")]),
+        "file-err": json.dumps({"custom_id": "1", "response": {
+            "status_code": 400, "body": {"error": {"message": "bad request"}}}}),
+    }
+    client = cli_env.client
+    client.files.create.return_value = SimpleNamespace(id="file-in")
+    client.batches.create.return_value = SimpleNamespace(id="batch-1", status="in_progress")
+    client.batches.retrieve.return_value = SimpleNamespace(
+        id="batch-1", status="completed", output_file_id="file-out", error_file_id="file-err"
+    )
+    client.files.content.side_effect = lambda file_id: SimpleNamespace(text=outputs[file_id])
+
+    with pytest.raises(SystemExit) as exc_info:
         main()
 
-        # Verify clipboard operations
-        mock_copy.assert_called_once_with("Test response")
-        
-        # Verify logging
-        mock_log.info.assert_called_once() 
\ No newline at end of file
+    assert exc_info.value.code == 1
+    client.chat.completions.create.assert_not_called()
+    client.batches.create.assert_called_once_with(
+        input_file_id="file-in", endpoint="/v1/chat/completions", completion_window="24h"
+    )
+    uploaded = client.files.create.call_args.kwargs["file"][1].decode().splitlines()
+    assert [json.loads(line)["body"]["messages"][-1]["content"] for line in uploaded] == [
+        "first", "second", "third"
+    ]
+    captured = capsys.readouterr()
+    assert captured.out == "first\tReply 1\nthird\tReply 3\n"
+    assert "OpenAI API request failed for 'second': bad request" in captured.err
@@ -2,9 +2,14 @@
 Tests for the clipboard functionality.
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 import pyperclip
 
+# Built once per module. pyperclip.copy is mocked, so the payload is never
+# round-tripped and 1 KB exercises the same path as a larger one would
+LARGE_CONTENT = "x" * 1024
+MULTILINE_CONTENT = "\n".join(["Line " + str(i) for i in range(1000)])
+
 @pytest.fixture
 def mock_clipboard():
     """Mock clipboard operations."""
@@ -30,9 +35,8 @@ def test_clipboard_operations(mock_clipboard):
 def test_clipboard_error_handling(mock_clipboard):
     """Test clipboard error handling."""
     mock_clipboard['paste'].side_effect = Exception("Clipboard error")
-    with pytest.raises(Exception) as exc_info:
+    with pytest.raises(Exception, match="^Clipboard error$"):
         pyperclip.paste()
-    assert str(exc_info.value) == "Clipboard error"
 
 def test_clipboard_unicode(mock_clipboard):
     """Test clipboard with Unicode content."""
@@ -48,17 +52,13 @@ def test_clipboard_unicode(mock_clipboard):
 
 def test_clipboard_large_content(mock_clipboard):
     """Test clipboard with large content."""
-    # Create a large string
-    large_content = "x" * 1000000  # 1 million characters
-    
     # Test copying large content
-    pyperclip.copy(large_content)
-    mock_clipboard['copy'].assert_called_once_with(large_content)
+    pyperclip.copy(LARGE_CONTENT)
+    mock_clipboard['copy'].assert_called_once_with(LARGE_CONTENT)
     
     # Test with multiple lines
-    multiline_content = "\n".join(["Line " + str(i) for i in range(1000)])
-    pyperclip.copy(multiline_content)
-    mock_clipboard['copy'].assert_called_with(multiline_content)
+    pyperclip.copy(MULTILINE_CONTENT)
+    mock_clipboard['copy'].assert_called_with(MULTILINE_CONTENT)
 
 def test_clipboard_special_characters(mock_clipboard):
     """Test clipboard with special characters."""
@@ -74,30 +74,22 @@ def test_clipboard_special_characters(mock_clipboard):
 
 def test_clipboard_multiple_operations(mock_clipboard):
     """Test multiple clipboard operations."""
-    # Test multiple copy-paste operations
+    # Test multiple copy-paste operations, then overwriting, clearing and
+    # setting new content
     contents = [
         "First content",
         "Second content",
-        "Third content"
+        "Third content",
+        "Original content",
+        "Overwritten content",
+        "",
+        "New content"
     ]
     
     for content in contents:
         pyperclip.copy(content)
-        mock_clipboard['copy'].assert_called_with(content)
-    
-    # Test overwriting content
-    pyperclip.copy("Original content")
-    mock_clipboard['copy'].assert_called_with("Original content")
     
-    pyperclip.copy("Overwritten content")
-    mock_clipboard['copy'].assert_called_with("Overwritten content")
-    
-    # Test clearing and setting new content
-    pyperclip.copy("")
-    mock_clipboard['copy'].assert_called_with("")
-    
-    pyperclip.copy("New content")
-    mock_clipboard['copy'].assert_called_with("New content")
+    mock_clipboard['copy'].assert_has_calls([call(content) for content in contents])
 
 def test_clipboard_empty_content(mock_clipboard):
     """Test clipboard with empty content."""
@@ -114,52 +106,23 @@ def test_clipboard_empty_content(mock_clipboard):
     mock_clipboard['copy'].assert_called_with("\n\n\n")
 
 def test_clipboard_concurrent_access(mock_clipboard):
-    """Test concurrent clipboard access."""
-    import threading
-    
+    """Test repeated clipboard access."""
+    # pyperclip is mocked, so threads would only exercise the mock; run serially
     def copy_content(content):
         pyperclip.copy(content)
         mock_clipboard['paste'].return_value = content
         assert pyperclip.paste() == content
-    
-    # Create multiple threads
-    threads = []
+
     contents = [f"Content {i}" for i in range(10)]
-    
     for content in contents:
-        thread = threading.Thread(target=copy_content, args=(content,))
-        threads.append(thread)
-        thread.start()
-    
-    # Wait for all threads to complete
-    for thread in threads:
-        thread.join()
-    
-    # Verify final clipboard content
-    mock_clipboard['paste'].return_value = contents[-1]
-    assert pyperclip.paste() in contents
+        copy_content(content)
 
-def test_clipboard_platform_specific(mock_clipboard):
-    """Test platform-specific clipboard behavior."""
-    # Test on Linux
-    with patch('platform.system', return_value='Linux'):
-        pyperclip.copy("Linux content")
-        mock_clipboard['copy'].assert_called_with("Linux content")
-    
-    # Test on Windows
-    with patch('platform.system', return_value='Windows'):
-        pyperclip.copy("Windows content")
-        mock_clipboard['copy'].assert_called_with("Windows content")
-    
-    # Test on macOS
-    with patch('platform.system', return_value='Darwin'):
-        pyperclip.copy("macOS content")
-        mock_clipboard['copy'].assert_called_with("macOS content")
+    # Verify final clipboard content
+    assert pyperclip.paste() == contents[-1]
 
 def test_clipboard_unsupported_platform(mock_clipboard):
     """Test clipboard on unsupported platform."""
     with patch('platform.system', return_value='Unsupported'):
         mock_clipboard['copy'].side_effect = Exception("Unsupported platform")
-        with pytest.raises(Exception) as exc_info:
-            pyperclip.copy("Test content")
-        assert "Unsupported platform" in str(exc_info.value) 
\ No newline at end of file
+        with pytest.raises(Exception, match="Unsupported platform"):
+            pyperclip.copy("Test content") 
\ No newline at end of file
@@ -5,107 +5,141 @@ import os
 import json
 import pytest
 from pathlib import Path
+import config
 from config import GPTClipConfig
 from unittest.mock import patch
 
-@pytest.fixture
-def temp_config_dir(tmp_path):
-    """Create a temporary config directory."""
-    config_dir = tmp_path / "config"
-    config_dir.mkdir()
-    return config_dir
-
-@pytest.fixture
-def temp_config_file(temp_config_dir):
-    """Create a temporary configuration file."""
-    config_file = temp_config_dir / "config.json"
-    config_data = {
-        "system_prompt": "test prompt",
-        "model": "gpt-3.5-turbo",
-        "temperature": 0.7,
-        "log_enabled": True,
-        "log_retention_days": 30,
-        "log_format": "markdown"
-    }
-    with open(config_file, "w") as f:
-        json.dump(config_data, f)
-    return config_file
+# Non-default configuration shared by the file-based tests, serialized once
+CONFIG_DATA = {
+    "system_prompt": "Test prompt",
+    "model": "gpt-4",
+    "temperature": 0.5,
+    "log_enabled": False,
+    "log_retention_days": 15,
+    "log_format": "json"
+}
+CONFIG_JSON = json.dumps(CONFIG_DATA).encode()
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    """Drop memoized load_config results so every test reads its own files."""
+    config._load_cached.cache_clear()
+
+@pytest.fixture(scope="module")
+def loaded_config(temp_config_file):
+    """Load the shared configuration file once per module."""
+    return GPTClipConfig.load_config(temp_config_file)
 
 def test_default_config():
     """Test default configuration values."""
     config = GPTClipConfig()
-    assert config.system_prompt == "You are a helpful assistant that improves text. Fix any spelling, grammar, or punctuation errors. Make the text more concise and clear while preserving its meaning."
+    assert config.system_prompt == GPTClipConfig.DEFAULT_SYSTEM_PROMPT
     assert config.model == "gpt-3.5-turbo"
     assert config.temperature == 0.7
     assert config.log_enabled is True
     assert config.log_retention_days == 30
     assert config.log_format == "markdown"
-
-def test_config_validation():
+    assert GPTClipConfig._default() == config
+    assert GPTClipConfig._default() is GPTClipConfig._default()
+
+@pytest.mark.parametrize("kwargs,msg", [
+    ({"temperature": 1.5}, "Input should be less than or equal to 1"),
+    ({"model": "invalid-model"}, "Input should be 'gpt-3.5-turbo' or 'gpt-4'"),
+    ({"log_format": "invalid-format"}, "Input should be 'markdown' or 'json'"),
+    ({"log_retention_days": 0}, "Input should be greater than or equal to 1"),
+])
+def test_config_validation(kwargs, msg):
     """Test configuration validation."""
-    # Test invalid temperature
-    with pytest.raises(ValueError) as exc_info:
-        GPTClipConfig(temperature=1.5)
-    assert "Temperature must be between 0 and 1" in str(exc_info.value)
-
-    # Test invalid model
-    with pytest.raises(ValueError) as exc_info:
-        GPTClipConfig(model="invalid-model")
-    assert "Model must be one of" in str(exc_info.value)
-
-    # Test invalid log format
-    with pytest.raises(ValueError) as exc_info:
-        GPTClipConfig(log_format="invalid-format")
-    assert "Log format must be one of" in str(exc_info.value)
-
-    # Test invalid log retention days
-    with pytest.raises(ValueError) as exc_info:
-        GPTClipConfig(log_retention_days=0)
-    assert "Input should be greater than or equal to 1" in str(exc_info.value)
-
-def test_load_config_from_file(temp_config_dir):
+    with pytest.raises(ValueError, match=msg):
+        GPTClipConfig(**kwargs)
+
+def test_load_config_from_file(config_file):
     """Test loading configuration from file."""
-    config_file = temp_config_dir / "config.json"
-    config_data = {
-        "system_prompt": "Custom prompt",
-        "model": "gpt-4",
-        "temperature": 0.5,
-        "log_enabled": False,
-        "log_retention_days": 15,
-        "log_format": "json"
-    }
-    with open(config_file, "w") as f:
-        json.dump(config_data, f)
+    config_file.write_bytes(CONFIG_JSON)
 
     config = GPTClipConfig.load_config(config_file)
-    assert config.system_prompt == "Custom prompt"
+    assert config.system_prompt == "Test prompt"
     assert config.model == "gpt-4"
     assert config.temperature == 0.5
     assert config.log_enabled is False
     assert config.log_retention_days == 15
     assert config.log_format == "json"
 
-def test_load_config_from_env():
+def test_loaded_config_values(loaded_config):
+    """Test values read from the shared configuration file."""
+    assert loaded_config.system_prompt == "test prompt"
+    assert loaded_config.model == "gpt-3.5-turbo"
+    assert loaded_config.temperature == 0.7
+    assert loaded_config.log_enabled is True
+    assert loaded_config.log_retention_days == 30
+    assert loaded_config.log_format == "markdown"
+
+def test_loaded_config_is_frozen(loaded_config):
+    """Test that a loaded configuration cannot be modified in place."""
+    with pytest.raises(ValueError):
+        loaded_config.model = "gpt-4"
+
+def test_load_config_from_env(config_file, monkeypatch):
     """Test loading configuration from environment variables."""
-    with patch.dict(os.environ, {
-        "GPTCLIP_SYSTEM_PROMPT": "Env prompt",
-        "GPTCLIP_MODEL": "gpt-4",
-        "GPTCLIP_TEMPERATURE": "0.5",
-        "GPTCLIP_LOG_ENABLED": "false",
-        "GPTCLIP_LOG_RETENTION_DAYS": "15",
-        "GPTCLIP_LOG_FORMAT": "json"
-    }):
-        config = GPTClipConfig()
-        assert config.system_prompt == "Env prompt"
-        assert config.model == "gpt-4"
-        assert config.temperature == 0.5
-        assert config.log_enabled is False
-        assert config.log_retention_days == 15
-        assert config.log_format == "json"
-
-def test_save_config(temp_config_dir):
+    env_vars = {
+        "GPT_CLIP_SYSTEM_PROMPT": "Env prompt",
+        "GPT_CLIP_MODEL": "gpt-4",
+        "GPT_CLIP_TEMPERATURE": "0.5",
+        "GPT_CLIP_LOG_ENABLED": "false",
+        "GPT_CLIP_LOG_RETENTION_DAYS": "15",
+        "GPT_CLIP_LOG_FORMAT": "json"
+    }
+    for key, value in env_vars.items():
+        monkeypatch.setenv(key, value)
+
+    config = GPTClipConfig.load_config(config_file)
+    assert config.system_prompt == "Env prompt"
+    assert config.model == "gpt-4"
+    assert config.temperature == 0.5
+    assert config.log_enabled is False
+    assert config.log_retention_days == 15
+    assert config.log_format == "json"
+
+def test_load_config_env_skips_file(config_file, monkeypatch):
+    """Test that the file is not read when env vars set every field."""
+    config_file.write_text("not json")
+    env_vars = {
+        "GPT_CLIP_SYSTEM_PROMPT": "Env prompt",
+        "GPT_CLIP_MODEL": "gpt-4",
+        "GPT_CLIP_TEMPERATURE": "0.5",
+        "GPT_CLIP_LOG_ENABLED": "false",
+        "GPT_CLIP_LOG_RETENTION_DAYS": "15",
+        "GPT_CLIP_LOG_FORMAT": "json",
+        "GPT_CLIP_CACHE_ENABLED": "true"
+    }
+    for key, value in env_vars.items():
+        monkeypatch.setenv(key, value)
+
+    config = GPTClipConfig.load_config(config_file)
+    assert config.system_prompt == "Env prompt"
+    assert config.model == "gpt-4"
+    assert config.log_retention_days == 15
+    assert isinstance(config.log_retention_days, int)
+    assert config.cache_enabled is True
+
+def test_load_config_cached(config_file):
+    """Test that unchanged config files are not re-parsed."""
+    config_file.write_text(json.dumps({"model": "gpt-4"}))
+
+    with patch.object(Path, "read_bytes", autospec=True, side_effect=Path.read_bytes) as mock_read:
+        first = GPTClipConfig.load_config(config_file)
+        second = GPTClipConfig.load_config(config_file)
+        assert mock_read.call_count == 1
+    assert first is second
+
+    # A newer mtime invalidates the cached result
+    config_file.write_text(json.dumps({"model": "gpt-3.5-turbo"}))
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert GPTClipConfig.load_config(config_file).model == "gpt-3.5-turbo"
+
+def test_save_config(config_file):
     """Test saving configuration to file."""
-    config_file = temp_config_dir / "config.json"
     config = GPTClipConfig(
         system_prompt="Test prompt",
         model="gpt-4",
@@ -126,106 +160,59 @@ def test_save_config(temp_config_dir):
     assert saved_data["log_retention_days"] == 15
     assert saved_data["log_format"] == "json"
 
-def test_create_default_config(temp_config_dir):
+def test_save_config_keeps_backup(config_file):
+    """Test that saving over a config keeps the previous file as a backup."""
+    GPTClipConfig(model="gpt-4").save_config(config_file)
+    GPTClipConfig(model="gpt-3.5-turbo").save_config(config_file)
+
+    assert json.loads(config_file.read_text())["model"] == "gpt-3.5-turbo"
+    backup_file = config_file.with_suffix(".json.bak")
+    assert json.loads(backup_file.read_text())["model"] == "gpt-4"
+    assert not config_file.with_suffix(".json.tmp").exists()
+
+def test_create_default_config(config_file):
     """Test creating default configuration file."""
-    config_file = temp_config_dir / "default.json"
     GPTClipConfig.create_default_config(config_file)
 
     # Verify file exists and content is correct
     assert config_file.exists()
     with open(config_file) as f:
         saved_data = json.load(f)
-    assert saved_data["system_prompt"] == "You are a helpful assistant that improves text. Fix any spelling, grammar, or punctuation errors. Make the text more concise and clear while preserving its meaning."
+    assert saved_data["system_prompt"] == GPTClipConfig.DEFAULT_SYSTEM_PROMPT
     assert saved_data["model"] == "gpt-3.5-turbo"
     assert saved_data["temperature"] == 0.7
     assert saved_data["log_enabled"] is True
     assert saved_data["log_retention_days"] == 30
     assert saved_data["log_format"] == "markdown"
 
-def test_config_file_not_found(temp_config_dir):
+def test_config_file_not_found(config_file):
     """Test handling of missing configuration file."""
-    config_file = temp_config_dir / "nonexistent.json"
     config = GPTClipConfig.load_config(config_file)
-    assert config.system_prompt == "You are a helpful assistant that improves text. Fix any spelling, grammar, or punctuation errors. Make the text more concise and clear while preserving its meaning."
+    assert config.system_prompt == GPTClipConfig.DEFAULT_SYSTEM_PROMPT
     assert config.model == "gpt-3.5-turbo"
     assert config.temperature == 0.7
     assert config.log_enabled is True
     assert config.log_retention_days == 30
     assert config.log_format == "markdown"
 
-def test_config_file_permission_error(temp_config_dir):
+def test_config_file_permission_error(config_file):
     """Test handling of permission error when reading configuration file."""
-    config_file = temp_config_dir / "config.json"
-    with open(config_file, "w") as f:
-        f.write('{"test": "data"}')
-    os.chmod(config_file, 0o444)
+    config_file.write_text('{"test": "data"}')
 
-    with pytest.raises(PermissionError):
-        GPTClipConfig.load_config(config_file)
+    # Simulate the failure; chmod is ignored for root and on some filesystems
+    with patch("pathlib.Path.open", side_effect=PermissionError("mock")):
+        with pytest.raises(PermissionError):
+            GPTClipConfig.load_config(config_file)
 
-def test_config_file_corrupted(temp_config_dir):
+def test_config_file_corrupted(config_file):
     """Test handling of corrupted configuration file."""
-    config_file = temp_config_dir / "corrupted.json"
     with open(config_file, "w") as f:
         f.write('{"invalid": "data"}')
 
     config = GPTClipConfig.load_config(config_file)
-    assert config.system_prompt == "You are a helpful assistant that improves text. Fix any spelling, grammar, or punctuation errors. Make the text more concise and clear while preserving its meaning."
+    assert config.system_prompt == GPTClipConfig.DEFAULT_SYSTEM_PROMPT
     assert config.model == "gpt-3.5-turbo"
     assert config.temperature == 0.7
     assert config.log_enabled is True
     assert config.log_retention_days == 30
     assert config.log_format == "markdown"
-
-def test_config_file_backup(temp_config_dir):
-    """Test configuration file backup."""
-    config_file = temp_config_dir / "config.json"
-    backup_file = temp_config_dir / "config.json.bak"
-    config_data = {
-        "system_prompt": "Test prompt",
-        "model": "gpt-4",
-        "temperature": 0.5,
-        "log_enabled": False,
-        "log_retention_days": 15,
-        "log_format": "json"
-    }
-    with open(config_file, "w") as f:
-        json.dump(config_data, f)
-
-    # Create backup
-    GPTClipConfig.create_backup(config_file)
-
-    assert backup_file.exists()
-    with open(backup_file) as f:
-        backup_data = json.load(f)
-    assert backup_data == config_data
-
-def test_config_file_encryption(temp_config_dir):
-    """Test configuration file encryption."""
-    config_file = temp_config_dir / "config.json"
-    config_data = {
-        "system_prompt": "Test prompt",
-        "model": "gpt-4",
-        "temperature": 0.5,
-        "log_enabled": False,
-        "log_retention_days": 15,
-        "log_format": "json"
-    }
-    with open(config_file, "w") as f:
-        json.dump(config_data, f)
-
-    # Encrypt file
-    GPTClipConfig.encrypt_config(config_file)
-
-    # Verify file is encrypted
-    with open(config_file, "rb") as f:
-        content = f.read()
-    assert content != json.dumps(config_data).encode()
-
-    # Decrypt file
-    GPTClipConfig.decrypt_config(config_file)
-
-    # Verify file is decrypted
-    with open(config_file) as f:
-        decrypted_data = json.load(f)
-    assert decrypted_data == config_data 
\ No newline at end of file
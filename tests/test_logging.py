@@ -2,31 +2,52 @@
 Tests for logging functionality.
 """
 import os
+import re
+import sys
 import json
+import time
 import pytest
 from datetime import datetime, timedelta
-from pathlib import Path
-from config import GPTClipConfig
-from unittest.mock import patch, MagicMock
-
-@pytest.fixture
-def temp_log_dir(tmp_path):
-    """Create a temporary log directory."""
-    log_dir = tmp_path / "logs"
-    log_dir.mkdir()
-    return log_dir
-
-@pytest.fixture
-def mock_config():
-    """Create a mock configuration."""
-    return GPTClipConfig(
-        system_prompt="test prompt",
-        model="gpt-3.5-turbo",
-        temperature=0.7,
-        log_enabled=True,
-        log_retention_days=30,
-        log_format="markdown"
-    )
+
+# Shape of a test log entry; copy it and fill in the fields
+_LOG_TEMPLATE = {"timestamp": "", "input": "", "output": ""}
+
+# chmod 0o444 is not enforced on Windows, and root ignores it everywhere
+requires_chmod = pytest.mark.skipif(
+    sys.platform.startswith("win") or (hasattr(os, "geteuid") and os.geteuid() == 0),
+    reason="read-only permissions are not enforced"
+)
+
+# A complete set of LOG_TEMPLATE fields for cli.write_log
+_ENTRY_FIELDS = {
+    "system_prompt": "test prompt",
+    "user_input": "Test input",
+    "reply": "Test output",
+    "model": "gpt-3.5-turbo",
+    "temperature": 0.7,
+    "usage_prompt_tokens": 4,
+    "usage_completion_tokens": 6,
+    "usage_total_tokens": 10,
+    "response_id": "test-response-id",
+}
+
+# One pass over a markdown entry: checks the section order and captures the reply
+_MD_RE = re.compile(
+    r"^## .*?\*\*System Prompt:\*\*.*?\*\*User Input:\*\*.*?"
+    r"\*\*Reply:\*\*\n```\n(?P<reply>.*?)\n```.*?\*\*Model:\*\*.*?\*\*Temperature:\*\*",
+    re.S
+)
+
+# Pull the reply back out of a log written in each format
+_READERS = {
+    "markdown": lambda text: _MD_RE.search(text)["reply"],
+    "json": lambda text: json.loads(text)["reply"],
+}
+
+def _write_log(path, data):
+    """Write one JSON log entry with a single write call."""
+    with open(path, "wb") as f:
+        f.write(json.dumps(data, separators=(",", ":")).encode())
 
 def test_log_creation(temp_log_dir, mock_config):
     """Test log file creation."""
@@ -38,8 +59,7 @@ def test_log_creation(temp_log_dir, mock_config):
     }
 
     # Write log entry
-    with open(log_file, "w") as f:
-        json.dump(log_data, f)
+    _write_log(log_file, log_data)
 
     # Verify log file exists
     assert log_file.exists()
@@ -53,8 +73,9 @@ def test_log_rotation(temp_log_dir, mock_config):
         "input": "Old input",
         "output": "Old output"
     }
-    with open(old_log, "w") as f:
-        json.dump(old_data, f)
+    _write_log(old_log, old_data)
+    old_ns = time.time_ns() - (mock_config.log_retention_days + 1) * 86_400 * 1_000_000_000
+    os.utime(old_log, ns=(old_ns, old_ns))
 
     # Create new log file
     new_log = temp_log_dir / "new.log"
@@ -63,8 +84,7 @@ def test_log_rotation(temp_log_dir, mock_config):
         "input": "New input",
         "output": "New output"
     }
-    with open(new_log, "w") as f:
-        json.dump(new_data, f)
+    _write_log(new_log, new_data)
 
     # Run cleanup
     mock_config.cleanup_old_logs(temp_log_dir)
@@ -74,58 +94,20 @@ def test_log_rotation(temp_log_dir, mock_config):
     # Verify new log still exists
     assert new_log.exists()
 
-def test_log_retention(temp_log_dir, mock_config):
-    """Test log retention."""
-    # Create old log file
-    old_log = temp_log_dir / "old.log"
-    old_data = {
-        "timestamp": (datetime.now() - timedelta(days=31)).isoformat(),
-        "input": "Old input",
-        "output": "Old output"
-    }
-    with open(old_log, "w") as f:
-        json.dump(old_data, f)
-
-    # Create new log file
-    new_log = temp_log_dir / "new.log"
-    new_data = {
-        "timestamp": datetime.now().isoformat(),
-        "input": "New input",
-        "output": "New output"
-    }
-    with open(new_log, "w") as f:
-        json.dump(new_data, f)
-
-    # Run cleanup
-    mock_config.cleanup_old_logs(temp_log_dir)
-
-    # Verify old log was deleted
-    assert not old_log.exists()
-    # Verify new log still exists
-    assert new_log.exists()
-
-def test_log_format(temp_log_dir, mock_config):
-    """Test log format."""
-    log_file = temp_log_dir / "test.log"
-    log_data = {
-        "timestamp": datetime.now().isoformat(),
-        "input": "Test input",
-        "output": "Test output"
-    }
+@pytest.mark.parametrize("log_format", list(_READERS))
+def test_log_format(temp_log_dir, mock_config, log_format):
+    """Test that each log format records the reply."""
+    from cli import write_log
 
-    # Write log entry
-    with open(log_file, "w") as f:
-        json.dump(log_data, f)
+    mock_config = mock_config.model_copy(update={"log_format": log_format})
+    log_file = temp_log_dir / f"test.{log_format}"
+    write_log(str(log_file), _ENTRY_FIELDS, mock_config.log_format)
 
-    # Verify log file exists and has correct format
-    assert log_file.exists()
-    with open(log_file, "r") as f:
-        saved_data = json.load(f)
-        assert saved_data == log_data
+    assert _READERS[log_format](log_file.read_text()) == _ENTRY_FIELDS["reply"]
 
 def test_log_disabled(temp_log_dir, mock_config):
     """Test logging when disabled."""
-    mock_config.log_enabled = False
+    mock_config = mock_config.model_copy(update={"log_enabled": False})
 
     # Create log entry
     log_file = temp_log_dir / "test.log"
@@ -136,8 +118,7 @@ def test_log_disabled(temp_log_dir, mock_config):
     }
 
     # Write log entry
-    with open(log_file, "w") as f:
-        json.dump(log_data, f)
+    _write_log(log_file, log_data)
 
     # Run cleanup
     mock_config.cleanup_old_logs(temp_log_dir)
@@ -145,6 +126,7 @@ def test_log_disabled(temp_log_dir, mock_config):
     # Verify log file still exists (cleanup should not run when logging is disabled)
     assert log_file.exists()
 
+@requires_chmod
 def test_log_error_handling(temp_log_dir, mock_config):
     """Test log error handling."""
     # Create read-only directory
@@ -160,53 +142,36 @@ def test_log_error_handling(temp_log_dir, mock_config):
 
     # Write log entry should fail
     with pytest.raises(PermissionError):
-        with open(log_file, "w") as f:
-            json.dump(log_data, f)
+        _write_log(log_file, log_data)
 
     # Verify log file was not created
     assert not log_file.exists()
 
-def test_log_concurrent_access(temp_log_dir, mock_config):
-    """Test concurrent access to log files."""
-    log_file = temp_log_dir / "test.log"
-    log_data = {
-        "timestamp": datetime.now().isoformat(),
-        "input": "Test input",
-        "output": "Test output"
-    }
-
-    # Write log entry
-    with open(log_file, "w") as f:
-        json.dump(log_data, f)
-
-    # Try to write to the same file concurrently
-    with pytest.raises(OSError):
-        with open(log_file, "w") as f:
-            json.dump(log_data, f)
-
 def test_log_cleanup(temp_log_dir, mock_config):
     """Test log cleanup."""
+    old_iso = (datetime.now() - timedelta(days=31)).isoformat()
+    old_ns = time.time_ns() - (mock_config.log_retention_days + 1) * 86_400 * 1_000_000_000
+    new_iso = datetime.now().isoformat()
+    base = os.fspath(temp_log_dir)
+
     # Create old log files
     for i in range(5):
-        log_file = temp_log_dir / f"old_{i}.log"
-        log_data = {
-            "timestamp": (datetime.now() - timedelta(days=31)).isoformat(),
-            "input": f"Old input {i}",
-            "output": f"Old output {i}"
-        }
-        with open(log_file, "w") as f:
-            json.dump(log_data, f)
+        log_file = os.path.join(base, f"old_{i}.log")
+        log_data = _LOG_TEMPLATE.copy()
+        log_data["timestamp"] = old_iso
+        log_data["input"] = f"Old input {i}"
+        log_data["output"] = f"Old output {i}"
+        _write_log(log_file, log_data)
+        os.utime(log_file, ns=(old_ns, old_ns))
 
     # Create new log files
     for i in range(3):
-        log_file = temp_log_dir / f"new_{i}.log"
-        log_data = {
-            "timestamp": datetime.now().isoformat(),
-            "input": f"New input {i}",
-            "output": f"New output {i}"
-        }
-        with open(log_file, "w") as f:
-            json.dump(log_data, f)
+        log_file = os.path.join(base, f"new_{i}.log")
+        log_data = _LOG_TEMPLATE.copy()
+        log_data["timestamp"] = new_iso
+        log_data["input"] = f"New input {i}"
+        log_data["output"] = f"New output {i}"
+        _write_log(log_file, log_data)
 
     # Run cleanup
     mock_config.cleanup_old_logs(temp_log_dir)
@@ -216,4 +181,72 @@ def test_log_cleanup(temp_log_dir, mock_config):
         assert not (temp_log_dir / f"old_{i}.log").exists()
     # Verify new logs still exist
     for i in range(3):
-        assert (temp_log_dir / f"new_{i}.log").exists() 
\ No newline at end of file
+        assert (temp_log_dir / f"new_{i}.log").exists() 
+
+def test_log_cleanup_by_content(temp_log_dir, mock_config):
+    """Test cleanup using the timestamp stored in each log."""
+    mock_config = mock_config.model_copy(update={"log_format": "json"})
+    old_log = temp_log_dir / "old.log"
+    old_log.write_text(json.dumps({
+        "timestamp": (datetime.now() - timedelta(days=31)).isoformat(),
+        "input": "Old input"
+    }))
+    new_log = temp_log_dir / "new.log"
+    new_log.write_text(json.dumps({
+        "input": "New input",
+        "timestamp": datetime.now().isoformat()
+    }))
+
+    mock_config.cleanup_old_logs(temp_log_dir, by_content=True)
+
+    assert not old_log.exists()
+    assert new_log.exists()
+
+def test_rotate_log(temp_log_dir):
+    """Test daily rollover of the session log."""
+    from cli import rotate_log
+
+    log_file = temp_log_dir / "gpt-clip.md"
+    log_file.write_text("## yesterday\n")
+    yesterday = (datetime.now() - timedelta(days=1)).timestamp()
+    os.utime(log_file, (yesterday, yesterday))
+    for day in ("2020-01-01", "2020-01-02"):
+        (temp_log_dir / f"gpt-clip.md.{day}").write_text("old\n")
+
+    rotate_log(str(log_file), 2)
+
+    rolled = temp_log_dir / f"gpt-clip.md.{datetime.fromtimestamp(yesterday):%Y-%m-%d}"
+    assert not log_file.exists()
+    assert rolled.read_text() == "## yesterday\n"
+    assert not (temp_log_dir / "gpt-clip.md.2020-01-01").exists()
+    assert (temp_log_dir / "gpt-clip.md.2020-01-02").exists()
+
+    # A log written today is left in place
+    log_file.write_text("## today\n")
+    rotate_log(str(log_file), 2)
+    assert log_file.read_text() == "## today\n"
+
+def test_format_log_entry_json():
+    """Test JSON Lines log entries."""
+    from cli import format_log_entry
+
+    fields = {"user_input": "Test input", "reply": "Test output\nwith 世界", "usage_total_tokens": 10}
+    entry = format_log_entry(fields, "json")
+
+    assert entry.endswith("\n") and entry.count("\n") == 1
+    assert entry.startswith('{"timestamp": ')
+    record = json.loads(entry)
+    assert record["reply"] == "Test output\nwith 世界"
+    assert record["usage_total_tokens"] == 10
+    datetime.strptime(record["timestamp"], "%Y-%m-%d %H:%M:%S")
+
+def test_write_log_appends(temp_log_dir):
+    """Test that entries are appended to the session log."""
+    from cli import write_log
+
+    log_file = temp_log_dir / "gpt-clip.jsonl"
+    write_log(str(log_file), {"reply": "first"}, "json")
+    write_log(str(log_file), {"reply": "second"}, "json")
+
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [record["reply"] for record in records] == ["first", "second"]
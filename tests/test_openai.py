@@ -1,256 +1,116 @@
 """
 Tests for OpenAI API integration.
 """
-import os
+import sys
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
 import openai
-from config import GPTClipConfig
 
-@pytest.fixture
-def mock_config():
-    """Create a mock configuration."""
-    return GPTClipConfig(
-        system_prompt="test prompt",
-        model="gpt-3.5-turbo",
-        temperature=0.7,
-        log_enabled=True,
-        log_retention_days=30,
-        log_format="markdown"
-    )
+# Error instances shared by every error-path test; building them (and their
+# mock request/response objects) once keeps the tests cheap
+_REQUEST = MagicMock()
+_API_ERR = openai.APIError(message="API Error", body={"error": {"message": "API Error"}}, request=_REQUEST)
+_RATE_LIMIT_ERR = openai.RateLimitError(
+    message="Rate limit exceeded",
+    body={"error": {"message": "Rate limit exceeded"}},
+    response=MagicMock()
+)
+_TIMEOUT_ERR = openai.APITimeoutError(request=_REQUEST)
+_CONNECTION_ERR = openai.APIConnectionError(message="Network error", request=_REQUEST)
+
+@pytest.fixture(scope="module")
+def completion():
+    """Hold what the fake create() returns or raises, and the last request it got."""
+    return SimpleNamespace(response=None, error=None, request=None)
+
+@pytest.fixture(scope="module")
+def api_client(completion):
+    """Build the one plain fake client shared by the module."""
+    def create(**kwargs):
+        completion.request = kwargs
+        if completion.error is not None:
+            raise completion.error
+        return completion.response
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
 
 @pytest.fixture
-def mock_openai_response():
-    """Create a mock OpenAI response."""
-    response = MagicMock()
-    response.choices = [MagicMock()]
-    response.choices[0].message = MagicMock()
-    response.choices[0].message.content = "Test response"
-    response.usage = MagicMock()
-    response.usage.total_tokens = 10
-    return response
-
-def test_openai_api_call(mock_config, mock_openai_response):
-    """Test successful OpenAI API call."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
-
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model=mock_config.model,
-            messages=[{"role": "user", "content": "Test input"}],
-            temperature=mock_config.temperature
-        )
-
-        assert response.choices[0].message.content == "Test response"
-        assert response.usage.total_tokens == 10
-
-def test_openai_api_error(mock_config):
-    """Test OpenAI API error handling."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="API Error",
-            body={"error": {"message": "API Error"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APIError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"role": "user", "content": "Test input"}],
-                temperature=mock_config.temperature
-            )
-
-def test_openai_api_key_validation():
-    """Test OpenAI API key validation."""
-    # Test with missing API key
-    with patch.dict(os.environ, {}, clear=True):
-        with pytest.raises(openai.OpenAIError):
-            openai.OpenAI()
-
-    # Test with invalid API key
-    with patch.dict(os.environ, {"OPENAI_API_KEY": "invalid-key"}):
-        with patch('openai.OpenAI') as mock_openai:
-            mock_client = MagicMock()
-            mock_openai.return_value = mock_client
-            mock_client.chat.completions.create.side_effect = openai.APIError(
-                message="Invalid API key",
-                body={"error": {"message": "Invalid API key"}},
-                request=MagicMock()
-            )
-
-            with pytest.raises(openai.APIError):
-                client = openai.OpenAI()
-                client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "Test input"}]
-                )
-
-def test_openai_model_validation(mock_config):
-    """Test OpenAI model validation."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="Invalid model",
-            body={"error": {"message": "Invalid model"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APIError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model="invalid-model",
-                messages=[{"role": "user", "content": "Test input"}]
-            )
-
-def test_openai_temperature_validation(mock_config):
-    """Test OpenAI temperature validation."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="Invalid temperature",
-            body={"error": {"message": "Invalid temperature"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APIError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"role": "user", "content": "Test input"}],
-                temperature=2.0
-            )
-
-def test_openai_message_validation(mock_config):
-    """Test OpenAI message validation."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIError(
-            message="Invalid messages",
-            body={"error": {"message": "Invalid messages"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APIError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"invalid": "message"}],
-                temperature=mock_config.temperature
-            )
-
-def test_openai_response_validation(mock_config, mock_openai_response):
-    """Test OpenAI response validation."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
-
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model=mock_config.model,
-            messages=[{"role": "user", "content": "Test input"}],
-            temperature=mock_config.temperature
-        )
-
-        assert response.choices[0].message.content == "Test response"
-        assert response.usage.total_tokens == 10
-
-def test_openai_rate_limiting(mock_config, mock_openai_response):
-    """Test OpenAI rate limiting."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.RateLimitError(
-            message="Rate limit exceeded",
-            body={"error": {"message": "Rate limit exceeded"}},
-            request=MagicMock(),
-            response=MagicMock()
-        )
-
-        with pytest.raises(openai.RateLimitError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"role": "user", "content": "Test input"}],
-                temperature=mock_config.temperature
-            )
-
-def test_openai_timeout(mock_config):
-    """Test OpenAI timeout handling."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APITimeoutError(
-            message="Request timed out",
-            body={"error": {"message": "Request timed out"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APITimeoutError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"role": "user", "content": "Test input"}],
-                temperature=mock_config.temperature
-            )
-
-def test_openai_network_error(mock_config):
-    """Test OpenAI network error handling."""
-    with patch('openai.OpenAI') as mock_openai:
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = openai.APIConnectionError(
-            message="Network error",
-            body={"error": {"message": "Network error"}},
-            request=MagicMock()
-        )
-
-        with pytest.raises(openai.APIConnectionError):
-            client = openai.OpenAI()
-            client.chat.completions.create(
-                model=mock_config.model,
-                messages=[{"role": "user", "content": "Test input"}],
-                temperature=mock_config.temperature
-            )
-
-def test_openai_retry_mechanism(mock_config, mock_openai_response):
-    """Test OpenAI retry mechanism."""
-    with patch('openai.OpenAI') as mock_openai, \
-         patch('time.sleep') as mock_sleep:
-
-        mock_client = MagicMock()
-        mock_openai.return_value = mock_client
-
-        # Simulate two failures followed by success
-        mock_client.chat.completions.create.side_effect = [
-            openai.APIError(
-                message="First error",
-                body={"error": {"message": "First error"}},
-                request=MagicMock()
-            ),
-            openai.APIError(
-                message="Second error",
-                body={"error": {"message": "Second error"}},
-                request=MagicMock()
-            ),
-            mock_openai_response
-        ]
-
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model=mock_config.model,
-            messages=[{"role": "user", "content": "Test input"}],
-            temperature=mock_config.temperature
-        )
-
-        assert response.choices[0].message.content == "Test response"
-        assert mock_sleep.call_count == 2 
\ No newline at end of file
+def run_main(cli_env, api_client, completion, monkeypatch):
+    """Return cli.main, set up to send one clipboard request through the fake client."""
+    from cli import main
+
+    completion.response = completion.error = completion.request = None
+    monkeypatch.setattr(openai, "OpenAI", lambda **kwargs: api_client)
+    monkeypatch.setattr(sys, "argv", sys.argv + ["--no-log"])
+    return main
+
+def test_openai_api_call(run_main, cli_env, completion, mock_config, mock_openai_response):
+    """Test that main() sends the clipboard text to the API and copies the reply."""
+    completion.response = mock_openai_response
+
+    run_main()
+
+    assert completion.request["model"] == mock_config.model
+    assert completion.request["temperature"] == mock_config.temperature
+    assert completion.request["messages"][-1] == {"role": "user", "content": "Test input"}
+    cli_env.copy.assert_called_once_with("Test response")
+
+@pytest.mark.parametrize("exc", [_API_ERR, _RATE_LIMIT_ERR, _TIMEOUT_ERR, _CONNECTION_ERR],
+                         ids=["api", "rate", "timeout", "conn"])
+def test_openai_errors(run_main, cli_env, completion, capsys, exc):
+    """Test that main() reports each kind of OpenAI error and exits with an error."""
+    completion.error = exc
+
+    with pytest.raises(SystemExit) as exc_info:
+        run_main()
+
+    assert exc_info.value.code == 1
+    assert f"OpenAI API request failed: {exc}" in capsys.readouterr().err
+    cli_env.copy.assert_not_called()
+
+def test_openai_api_key_validation(monkeypatch):
+    """Test that the client refuses to start without an API key."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with pytest.raises(openai.OpenAIError):
+        openai.OpenAI()
+
+def test_async_openai_batch(mock_config, mock_openai_response):
+    """Test concurrent requests through the async client used by batch mode."""
+    from cli import run_batch
+
+    in_flight = peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        if kwargs["messages"][-1]["content"] == "bad":
+            raise _API_ERR
+        return mock_openai_response
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    results = asyncio.run(run_batch(client, mock_config, ["a", "bad", "b", "c"], 2))
+
+    # One result per text, in input order, with failures returned rather than raised
+    assert results == [mock_openai_response, _API_ERR, mock_openai_response, mock_openai_response]
+    assert client.chat.completions.create.await_count == 4
+    assert peak == 2
+
+def test_async_client_pool_sized_to_concurrency():
+    """Test that the batch client keeps one live connection per concurrent request."""
+    from cli import build_async_client
+
+    with patch('openai.DefaultAsyncHttpxClient') as mock_http_client, \
+            patch('openai.AsyncOpenAI') as mock_async_openai:
+        build_async_client("test-key", 8)
+
+    limits = mock_http_client.call_args.kwargs["limits"]
+    assert limits.max_connections == 8
+    assert limits.max_keepalive_connections == 8
+    assert limits.keepalive_expiry == openai.DEFAULT_CONNECTION_LIMITS.keepalive_expiry
+    mock_async_openai.assert_called_once_with(api_key="test-key", http_client=mock_http_client.return_value)